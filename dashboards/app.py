@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import sys
 from pathlib import Path
 import plotly.express as px
 import plotly.graph_objects as go
@@ -9,18 +10,46 @@ import numpy as np
 # ─── 1. Load data ─────────────────────────────────────────────
 
 # ─── Resolve paths ─────────────────────────────────────────────
-BASE_DIR  = Path(__file__).resolve().parent.parent
-RAW_DIR   = BASE_DIR / "data" / "raw"
-PROC_DIR  = BASE_DIR / "data" / "processed"
+BASE_DIR   = Path(__file__).resolve().parent.parent
+RAW_DIR    = BASE_DIR / "data" / "raw"
+PROC_DIR   = BASE_DIR / "data" / "processed"
+SHARED_DIR = BASE_DIR / "data" / "shared"
+
+# Streamlit re-executes this script on every interaction; add src/ only once
+SRC_DIR = str(BASE_DIR / "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+# shared_dataset only imports pyarrow once a version is mapped, and
+# feature_store is only needed when the store has not been built yet
+from shared_dataset import current_version, load_frames
+from analysis import WEEKDAYS, temp_weekday_pivot
+
+FEATURES_PATH = BASE_DIR / "data" / "features.feather"
+
+# Only the columns the charts use; skipping the text columns keeps the
+# shared frames zero-copy views of the mapped files
+COLUMNS = ["date", "TMAX", "TMIN", "demand"]
+
+@st.cache_resource(max_entries=2)
+def load_shared_data(version):
+    """
+    Maps the published Arrow files for `version` read-only. cache_resource
+    hands the same objects to every session (no pickling or copying), and
+    the mapped pages are shared with other replicas on the host. A new
+    pipeline publish changes `version`, so it is picked up on the next rerun.
+    """
+    return load_frames(SHARED_DIR, version, columns=COLUMNS)
 
-# ─── Find all cities by processed CSV filenames ───────────────
-cities = [p.stem for p in PROC_DIR.glob("*.csv")]
+def feature_store_mtime():
+    return FEATURES_PATH.stat().st_mtime if FEATURES_PATH.exists() else None
 
-# Graceful error if no data
-if not cities:
-    st.error(f"❌ No processed data found in `{PROC_DIR}`. "
-             "Run `python src/pipeline.py` locally and commit the results.")
-    st.stop()
+@st.cache_resource(max_entries=2)
+def load_feature_store(mtime):
+    """
+    Loads the pipeline's feature store once per file version and shares it
+    across sessions; `mtime` changes when the pipeline rewrites the file.
+    """
+    return pd.read_feather(FEATURES_PATH) if mtime is not None else None
 
 @st.cache_data
 def load_city_data(city_slug):
@@ -31,7 +60,19 @@ def load_city_data(city_slug):
     df = pd.read_csv(path, parse_dates=["date"])
     return df
 
-data = {city: load_city_data(city) for city in cities}
+# ─── Prefer the shared dataset, fall back to processed CSVs ───
+version = current_version(SHARED_DIR)
+if version:
+    data = load_shared_data(version)
+else:
+    data = {p.stem: load_city_data(p.stem) for p in PROC_DIR.glob("*.csv")}
+cities = list(data)
+
+# Graceful error if no data
+if not cities:
+    st.error(f"❌ No processed data found in `{PROC_DIR}`. "
+             "Run `python src/pipeline.py` locally and commit the results.")
+    st.stop()
 
 # ─── 2. Sidebar Controls ──────────────────────────────
 st.sidebar.title("Controls")
@@ -257,28 +298,24 @@ corr_placeholder.plotly_chart(fig_corr, use_container_width=True)
 # Select which city to show on the heatmap
 hm_city = st.sidebar.selectbox("Heatmap: select city", sel_cities, index=0)
 
-# Subset & prepare data
-df_h = filtered[hm_city].copy()
-df_h["temp_avg"] = (df_h["TMAX"] + df_h["TMIN"]) / 2
-df_h["weekday"]  = df_h["date"].dt.day_name()
-
-# Bin temperatures
-bin_edges  = [float("-inf"), 50, 60, 70, 80, 90, float("inf")]
-bin_labels = ["<50°F", "50-60°F", "60-70°F", "70-80°F", "80-90°F", ">90°F"]
-df_h["temp_bin"] = pd.cut(df_h["temp_avg"], bins=bin_edges, labels=bin_labels)
-
-# Compute average demand per (temp_bin, weekday)
-pivot = (
-    df_h
-    .groupby(["temp_bin","weekday"])["demand"]
-    .mean()
-    .reset_index()
-    .pivot(index="temp_bin", columns="weekday", values="demand")
-)
-
-# Ensure consistent ordering
-weekdays = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-pivot = pivot.reindex(index=bin_labels, columns=weekdays)
+# Read precomputed temp bins/weekdays from the feature store; only compute
+# them here when the pipeline has not built the store yet
+feats = load_feature_store(feature_store_mtime())
+if (feats is not None and "city" in feats
+        and hm_city in feats["city"].cat.categories):
+    df_h = feats.loc[
+        (feats["city"] == hm_city) &
+        (feats["date"] >= pd.to_datetime(date_range[0])) &
+        (feats["date"] <= pd.to_datetime(date_range[1]))
+    ]
+else:
+    from feature_store import build_features
+    df_h = build_features({hm_city: filtered[hm_city]})
+
+# Average demand per (temp_bin, weekday), consistently ordered
+bin_labels = list(df_h["temp_bin"].cat.categories)
+weekdays   = WEEKDAYS
+pivot = temp_weekday_pivot(df_h).reindex(index=bin_labels, columns=weekdays)
 
 # Build the heatmap
 fig_heat = go.Figure(data=go.Heatmap(
@@ -21,3 +21,27 @@ def weekday_vs_weekend(df: pd.DataFrame) -> dict:
             'avg_demand': grp['demand'].mean()
         }
     return stats
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def degree_day_correlation(features: pd.DataFrame) -> dict:
+    """Return per-city Pearson’s r of demand vs heating and cooling degree days."""
+    stats = {}
+    for city, grp in features.groupby('city', observed=True):
+        stats[str(city)] = {
+            'hdd': grp['hdd'].corr(grp['demand']),
+            'cdd': grp['cdd'].corr(grp['demand'])
+        }
+    return stats
+
+def temp_weekday_pivot(features: pd.DataFrame) -> pd.DataFrame:
+    """Return average demand per (temp_bin, weekday) from precomputed features."""
+    pivot = (
+        features
+        .groupby(['temp_bin', 'dayofweek'], observed=False)['demand']
+        .mean()
+        .unstack('dayofweek')
+        .reindex(columns=range(7))
+    )
+    pivot.columns = WEEKDAYS
+    return pivot
@@ -3,8 +3,115 @@ src/data_processor.py
 Cleaning and transformation of raw weather & energy data.
 """
 
+import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Optional, Sequence, Tuple, Union
+
+# Friendly names for the target frequencies supported by resample_numeric
+RESAMPLE_FREQS = {"hourly": "h", "daily": "D", "weekly": "W"}
+
+def _group_fill(frame: pd.DataFrame, keys: list, method: str) -> pd.DataFrame:
+    """ffill/bfill within each group (or the whole frame when ungrouped)."""
+    if keys:
+        return getattr(frame.groupby(level=keys, sort=False), method)()
+    return getattr(frame, method)()
+
+def resample_numeric(
+    df: pd.DataFrame,
+    freq: str = "daily",
+    by: Union[str, Sequence[str], None] = None,
+    agg: str = "mean",
+    limit: Optional[int] = 2,
+    date_col: str = "date",
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Resample every numeric column to `freq` for all groups in one pass, then
+    linearly interpolate short interior gaps.
+
+    Args:
+        df: Input DataFrame with a date column, possibly several rows per date
+        freq: 'hourly', 'daily', 'weekly' or any pandas offset alias
+        by: Column(s) identifying independent series, e.g. 'city'
+        agg: Aggregation applied to numeric columns within each bin
+        limit: Max consecutive missing bins to fill per gap (None = no limit)
+        date_col: Name of the date column
+
+    Returns:
+        (resampled, gap_mask). `resampled` has one row per group and bin
+        between each group's first and last observation, in the input's
+        column order; non-numeric columns keep their first value per bin and
+        are forward-filled within each group into bins that had no rows. `gap_mask` is a boolean frame of the
+        numeric columns, row-aligned with `resampled`, that is True where a
+        value was imputed, so stats can exclude them with `.mask(gap_mask)`.
+    """
+    rule = RESAMPLE_FREQS.get(freq, freq)
+    keys = [by] if isinstance(by, str) else list(by or [])
+
+    df = df.assign(**{date_col: pd.to_datetime(df[date_col], errors="coerce")})
+    df = df.dropna(subset=[date_col])
+    num_cols = [c for c in df.select_dtypes("number").columns if c not in keys]
+    other_cols = [c for c in df.columns
+                  if c not in num_cols and c not in keys and c != date_col]
+
+    # 1) Aggregate into bins per group
+    grouped = df.groupby(keys + [pd.Grouper(key=date_col, freq=rule)])
+    binned = grouped[num_cols].agg(agg)
+    if other_cols:
+        binned = binned.join(grouped[other_cols].first())
+    if binned.empty:
+        out = binned.reset_index()[list(df.columns)]
+        return out, pd.DataFrame(False, index=out.index, columns=num_cols)
+
+    # 2) Reindex onto a regular grid spanning each group's own date range
+    labels = binned.index.get_level_values(date_col)
+    grid = pd.date_range(labels.min(), labels.max(), freq=rule, name=date_col)
+    if keys:
+        spans = (
+            pd.Series(labels, index=binned.index.droplevel(date_col))
+            .groupby(level=keys)
+            .agg(["min", "max"])
+            .reset_index()
+        )
+        full = spans.merge(grid.to_frame(index=False), how="cross")
+        full = full[(full[date_col] >= full["min"]) & (full[date_col] <= full["max"])]
+        full_index = pd.MultiIndex.from_frame(full[keys + [date_col]])
+    else:
+        full_index = grid
+    binned = binned.reindex(full_index)
+    if other_cols:
+        binned[other_cols] = _group_fill(binned[other_cols], keys, "ffill")
+
+    # 3) Linear interpolation in bin positions, all columns and groups at once
+    values = binned[num_cols].astype(float)
+    missing = values.isna()
+    pos = np.arange(len(values), dtype=float)[:, None]
+    pos_df = pd.DataFrame(np.where(missing, np.nan, pos),
+                          index=values.index, columns=num_cols)
+
+    prev_pos = _group_fill(pos_df, keys, "ffill")
+    next_pos = _group_fill(pos_df, keys, "bfill")
+    prev_val = _group_fill(values, keys, "ffill")
+    next_val = _group_fill(values, keys, "bfill")
+
+    step = pos - prev_pos
+    gap_mask = missing & prev_pos.notna() & next_pos.notna()
+    if limit is not None:
+        gap_mask &= step <= limit
+    interp = prev_val + (next_val - prev_val) * step / (next_pos - prev_pos)
+    binned[num_cols] = values.mask(gap_mask, interp)
+
+    # Same column order as the input, like the non-resampling path
+    out = binned.reset_index()[list(df.columns)]
+    return out, gap_mask.reset_index(drop=True)
+
+def _interpolate_daily(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resample to daily, averaging rows that share a date, and fill gaps of up
+    to 2 days. Adds a boolean `<col>_imputed` column per numeric column so
+    downstream stats can exclude filled values.
+    """
+    out, gap_mask = resample_numeric(df, freq="daily", limit=2)
+    return out.join(gap_mask.add_suffix("_imputed"))
 
 def clean_weather(df: pd.DataFrame, interpolate: bool = False) -> pd.DataFrame:
     """
@@ -12,7 +119,9 @@ def clean_weather(df: pd.DataFrame, interpolate: bool = False) -> pd.DataFrame:
     
     Args:
         df: Input weather DataFrame
-        interpolate: Whether to interpolate missing daily values
+        interpolate: Whether to interpolate missing daily values; rows that
+            share a date are then averaged instead of deduplicated, and
+            `<col>_imputed` flags mark the filled values
     
     Returns:
         Cleaned DataFrame with proper date handling
@@ -20,12 +129,11 @@ def clean_weather(df: pd.DataFrame, interpolate: bool = False) -> pd.DataFrame:
     df = df.copy()
     df['date'] = pd.to_datetime(df['date'], errors='coerce')
     df = df.dropna(subset=['date'])  # drop invalid dates
-    df = df.drop_duplicates(subset=['date'])
     
     if interpolate:
-        df = df.set_index('date').resample('D').interpolate(limit=2).reset_index()
+        return _interpolate_daily(df)
         
-    return df
+    return df.drop_duplicates(subset=['date'])
 
 def clean_energy(df: pd.DataFrame, interpolate: bool = False) -> pd.DataFrame:
     """
@@ -33,7 +141,9 @@ def clean_energy(df: pd.DataFrame, interpolate: bool = False) -> pd.DataFrame:
     
     Args:
         df: Input energy DataFrame
-        interpolate: Whether to interpolate missing daily values
+        interpolate: Whether to interpolate missing daily values; rows that
+            share a date are then averaged instead of deduplicated, and
+            `<col>_imputed` flags mark the filled values
     
     Returns:
         Cleaned DataFrame with proper date handling
@@ -41,12 +151,11 @@ def clean_energy(df: pd.DataFrame, interpolate: bool = False) -> pd.DataFrame:
     df = df.copy()
     df['date'] = pd.to_datetime(df['date'], errors='coerce')
     df = df.dropna(subset=['date'])  # drop invalid dates
-    df = df.drop_duplicates(subset=['date'])
     
     if interpolate:
-        df = df.set_index('date').resample('D').interpolate(limit=2).reset_index()
+        return _interpolate_daily(df)
         
-    return df
+    return df.drop_duplicates(subset=['date'])
 
 def merge_weather_energy(df_w: pd.DataFrame, df_e: pd.DataFrame) -> pd.DataFrame:
     """
@@ -22,9 +22,10 @@ def check_freshness(df: pd.DataFrame, date_col="date"):
     latest = dates.max()
     return {"latest": str(latest), "days_old": int((TODAY - latest).days)}
 
-def analyze_city(city_slug: str) -> dict:
-    weather = pd.read_csv(RAW_DIR / f"{city_slug}_weather.csv")
-    energy  = pd.read_csv(RAW_DIR / f"{city_slug}_energy.csv")
+def analyze_city(city_slug: str, raw_dir: Path = None) -> dict:
+    raw_dir = raw_dir or RAW_DIR
+    weather = pd.read_csv(raw_dir / f"{city_slug}_weather.csv")
+    energy  = pd.read_csv(raw_dir / f"{city_slug}_energy.csv")
 
     return {
         "missing_weather":  check_missing(weather),
@@ -35,11 +36,12 @@ def analyze_city(city_slug: str) -> dict:
         "freshness_energy":  check_freshness(energy,  "date"),
     }
 
-def generate_report() -> dict:
+def generate_report(raw_dir: Path = None) -> dict:
+    raw_dir = raw_dir or RAW_DIR
     report = {}
-    for weather_file in RAW_DIR.glob("*_weather.csv"):
+    for weather_file in raw_dir.glob("*_weather.csv"):
         slug = weather_file.stem.replace("_weather", "")
-        report[slug] = analyze_city(slug)
+        report[slug] = analyze_city(slug, raw_dir)
     return report
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+"""
+src/feature_store.py
+Degree-day and calendar features for demand modeling, computed for all
+cities in one grouped pass and persisted with compact dtypes.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+FEATURES_PATH = Path("data/features.feather")
+
+# Degree-day base temperature (°F), the usual US utility convention
+BASE_TEMP_F = 65.0
+
+ROLL_WINDOWS = (3, 7, 30)    # calendar days
+LAGS = {"temp_avg": (1,), "demand": (1, 7)}
+
+# Incremental updates use this many stored days before a city's new rows as
+# context, so rolling windows and lags for those rows see their full history
+LOOKBACK_DAYS = max(max(ROLL_WINDOWS), max(max(v) for v in LAGS.values()))
+
+# Same bins as the dashboard heatmap
+TEMP_BIN_EDGES  = [float("-inf"), 50, 60, 70, 80, 90, float("inf")]
+TEMP_BIN_LABELS = ["<50°F", "50-60°F", "60-70°F", "70-80°F", "80-90°F", ">90°F"]
+
+
+def _to_long(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Stack {slug: processed frame} into one frame with a `city` column."""
+    long = pd.concat(
+        [df[["date", "TMAX", "TMIN", "demand"]].assign(city=slug)
+         for slug, df in frames.items()],
+        ignore_index=True,
+    )
+    long["date"] = pd.to_datetime(long["date"])
+    return long.sort_values(["city", "date"], ignore_index=True)
+
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast to the dtypes the store is persisted with."""
+    # Demand and its lags/rolling means stay float64: regional totals can
+    # exceed float32's exact range, and a lag must equal the day it copies
+    floats = [c for c in df.columns
+              if df[c].dtype.kind == "f" and not c.startswith("demand")]
+    df[floats] = df[floats].astype("float32")
+    df["city"] = df["city"].astype("category")
+    df["temp_bin"] = pd.Categorical(df["temp_bin"], categories=TEMP_BIN_LABELS,
+                                    ordered=True)
+    return df
+
+
+def _build(long: pd.DataFrame) -> pd.DataFrame:
+    """Compute every feature for a long frame sorted by city and date."""
+    df = long.copy()
+    # Same dtypes whether a column arrives as ints, floats or mixed with
+    # float32 context rows read back from the store
+    df = df.astype({"TMAX": "float64", "TMIN": "float64", "demand": "float64"})
+    df["temp_avg"] = (df["TMAX"] + df["TMIN"]) / 2
+
+    # Degree days
+    df["hdd"] = (BASE_TEMP_F - df["temp_avg"]).clip(lower=0)
+    df["cdd"] = (df["temp_avg"] - BASE_TEMP_F).clip(lower=0)
+
+    # Rolling means over calendar-day windows, all cities at once. The frame
+    # is sorted by city then date, so results line up positionally.
+    grouped = df.groupby("city", sort=False)
+    for w in ROLL_WINDOWS:
+        rolled = grouped.rolling(f"{w}D", on="date", min_periods=1)[["temp_avg", "demand"]].mean()
+        df[f"temp_avg_roll{w}"] = rolled["temp_avg"].to_numpy()
+        df[f"demand_roll{w}"] = rolled["demand"].to_numpy()
+
+    # Lags by calendar day (a missing day gives NaN rather than the wrong row)
+    for col, lags in LAGS.items():
+        for k in lags:
+            shifted = df[["city", "date", col]].assign(
+                date=df["date"] + pd.Timedelta(days=k))
+            df[f"{col}_lag{k}"] = df[["city", "date"]].merge(
+                shifted, on=["city", "date"], how="left")[col].to_numpy()
+
+    # Calendar
+    df["dayofweek"] = df["date"].dt.dayofweek.astype("int8")
+    df["month"] = df["date"].dt.month.astype("int8")
+    df["is_weekend"] = df["dayofweek"] >= 5
+    holidays = USFederalHolidayCalendar().holidays(df["date"].min(), df["date"].max())
+    df["is_holiday"] = df["date"].dt.normalize().isin(holidays)
+
+    df["temp_bin"] = pd.cut(df["temp_avg"], bins=TEMP_BIN_EDGES, labels=TEMP_BIN_LABELS)
+    return _compact(df)
+
+
+def build_features(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Build the feature table for every city.
+
+    Args:
+        frames: {city slug: processed DataFrame with date, TMAX, TMIN, demand}
+
+    Returns:
+        One row per city and date with degree days, rolling windows, lags,
+        calendar/holiday flags and temperature bins
+    """
+    if not frames:
+        return pd.DataFrame()
+    long = _to_long(frames)
+    if long.empty:
+        return pd.DataFrame()
+    return _build(long)
+
+
+def load_features(path: Path = FEATURES_PATH) -> pd.DataFrame:
+    return pd.read_feather(path)
+
+
+def save_features(df: pd.DataFrame, path: Path = FEATURES_PATH):
+    """Write the store atomically so readers never see a partial file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    df.reset_index(drop=True).to_feather(tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def update_features(frames: Dict[str, pd.DataFrame], path: Path = FEATURES_PATH,
+                    full: bool = False) -> pd.DataFrame:
+    """
+    Recompute the cities in `frames` and persist the result. For each of
+    them, every stored row from the frame's first date onward is replaced,
+    so revised days are picked up; older stored rows are kept and their last
+    LOOKBACK_DAYS serve as context. Cities not in `frames` are left alone.
+    Pass `full=True` to rebuild the whole store from `frames` only.
+    """
+    path = Path(path)
+    existing = load_features(path) if path.exists() else None
+    if full or existing is None:
+        feats = build_features(frames)
+        if feats.empty:
+            # Nothing to build from; never replace the store with an empty table
+            return existing if existing is not None else feats
+        save_features(feats, path)
+        return feats
+
+    if not frames:
+        return existing
+    long = _to_long(frames)
+    if long.empty:
+        return existing
+    first = long.groupby("city")["date"].min()
+    stored = existing.astype({"city": str})
+    start = stored["city"].map(first)  # NaT for cities that are not updated
+    before = stored["date"] < start
+
+    context = stored.loc[before & (stored["date"] >= start - pd.Timedelta(days=LOOKBACK_DAYS)),
+                         long.columns]
+    new = _build(pd.concat([context, long], ignore_index=True)
+                 .sort_values(["city", "date"], ignore_index=True))
+    new = new[new["date"] >= new["city"].astype(str).map(first)]
+
+    feats = pd.concat([stored[start.isna() | before], new.astype({"city": str})],
+                      ignore_index=True)
+    feats = _compact(feats.sort_values(["city", "date"], ignore_index=True))
+    if feats.equals(existing):
+        return existing
+    save_features(feats, path)
+    return feats
@@ -1,19 +1,66 @@
+"""
+src/pipeline.py
+Command-line entry point: fetch → save raw → process → report → features
+→ publish.
+
+Heavy modules (pandas, requests, yaml and the fetchers/processors built on
+them) are imported inside the functions that need them, so cheap
+subcommands such as `validate` start without paying for them.
+"""
+
+import argparse
+import json
 import logging
+import sys
+from datetime import datetime
+from functools import partial
 from pathlib import Path
-import yaml
-import json
 
-# Fetchers
-from data_fetcher import fetch_historical_weather, fetch_historical_energy
-# Processors
-from data_processor import clean_weather, clean_energy, merge_weather_energy
-# Quality report
-from data_quality_report import generate_report
+# Resumable run state (stdlib only)
+from run_manifest import RunManifest, DONE, FAILED, fingerprint_obj, fingerprint_files
+
+FETCH_DAYS = 92
+
+# A completed fetch is reused by --resume while its window ended at most this
+# many days ago (config key `fetch_max_age_days`). One day lets a run that hit
+# a daily API quota resume tomorrow without refetching finished cities.
+FETCH_MAX_AGE_DAYS = 1
+
+REQUIRED_KEYS      = ("noaa_token", "eia_key", "cities")
+REQUIRED_CITY_KEYS = ("name", "station_id", "region")
 
 def load_config(path: str):
+    import yaml
+
     with open(path, 'r') as f:
         return yaml.safe_load(f)
 
+def validate_config(config) -> list:
+    """Return a list of human-readable problems; empty means the config is usable."""
+    if not isinstance(config, dict):
+        return ["config must be a mapping"]
+    problems = [f"missing key: {k}" for k in REQUIRED_KEYS if k not in config]
+    if "cities" not in config:
+        return problems
+    cities = config["cities"]
+    if not isinstance(cities, list):
+        return problems + ["cities must be a list"]
+    if not cities:
+        return problems + ["cities is empty"]
+    seen = set()
+    for i, city in enumerate(cities):
+        if not isinstance(city, dict):
+            problems.append(f"cities[{i}] must be a mapping")
+            continue
+        problems += [f"cities[{i}] missing key: {k}"
+                     for k in REQUIRED_CITY_KEYS if k not in city]
+        if "name" in city:
+            slug = city_slug(city["name"])
+            if slug in seen:
+                problems.append(f"duplicate city: {city['name']}")
+            seen.add(slug)
+    return problems
+
 def setup_logging(log_file: Path):
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
@@ -29,76 +76,629 @@ def setup_logging(log_file: Path):
 
     return logger
 
-if __name__ == "__main__":
-    # --- Setup ---
-    config = load_config("config/config.yaml")
+def city_slug(name: str) -> str:
+    return name.lower().replace(" ", "_")
 
-    logs_dir = Path("logs")
-    logs_dir.mkdir(exist_ok=True)
-    logger = setup_logging(logs_dir / "pipeline.log")
+def select_cities(cities: list, only=None) -> list:
+    """
+    Restrict `cities` to those named in `only` (display names or slugs).
+    Raises ValueError for names that are not in the config.
+    """
+    if not only:
+        return list(cities)
+    wanted = {city_slug(n.strip()) for n in only if n.strip()}
+    known  = {city_slug(c["name"]) for c in cities}
+    unknown = wanted - known
+    if unknown:
+        raise ValueError(f"Unknown cities in --only: {', '.join(sorted(unknown))}")
+    return [c for c in cities if city_slug(c["name"]) in wanted]
+
+def fetch_fingerprint(city: dict, days: int) -> str:
+    """
+    What was requested. The window end date is deliberately left out and
+    checked separately against the staleness threshold (see fetch_is_fresh).
+    """
+    return fingerprint_obj({
+        "station_id": city["station_id"],
+        "region":     city["region"],
+        "days":       days,
+    })
+
+def fetch_is_fresh(entry: dict, max_age_days: int) -> bool:
+    """True when a recorded fetch window ended at most `max_age_days` ago."""
+    end = entry.get("window_end")
+    if end is None:
+        return False
+    age = datetime.utcnow().date() - datetime.fromisoformat(end).date()
+    return age.days <= max_age_days
+
+def fetch_city(city: dict, config: dict, raw_dir: Path,
+               manifest: RunManifest, resume: bool, logger,
+               refresh: bool = False) -> bool:
+    """
+    Fetch and save raw weather & energy for one city. With `resume`, a city
+    whose last fetch completed for the same request and is still fresh
+    enough is skipped; `refresh` forces a new fetch regardless.
+    Returns True when raw files are available.
+    """
+    import data_fetcher
+
+    name = city["name"]
+    slug = city_slug(name)
+    weather_path = raw_dir / f"{slug}_weather.csv"
+    energy_path  = raw_dir / f"{slug}_energy.csv"
+
+    fetch_fp = fetch_fingerprint(city, FETCH_DAYS)
+    max_age = config.get("fetch_max_age_days", FETCH_MAX_AGE_DAYS)
+    if (resume and not refresh
+            and manifest.is_done(slug, "fetched", fetch_fp)
+            and fetch_is_fresh(manifest.stage(slug, "fetched"), max_age)):
+        logger.info(f"⏭️ Skipping fetch for {name} (already fetched)")
+        return True
+
+    # 1) Weather
+    logger.info(f"🌡️ Fetching weather for {name}")
+    try:
+        df_w = data_fetcher.fetch_historical_weather(
+            station_id=city["station_id"],
+            days=FETCH_DAYS,
+            token=config["noaa_token"]
+        )
+        df_w.to_csv(weather_path, index=False)
+        logger.info(f"✅ Saved RAW weather → {weather_path}")
+    except Exception as e:
+        logger.error(f"Error fetching weather for {name}: {e}")
+        manifest.mark(slug, "fetched", FAILED, fetch_fp, error=str(e))
+        return False  # skip processing if weather fails
+
+    # 2) Energy
+    logger.info(f"⚡ Fetching energy for {name}")
+    try:
+        df_e = data_fetcher.fetch_historical_energy(
+            region=city["region"],
+            days=FETCH_DAYS,
+            api_key=config["eia_key"]
+        )
+        df_e.to_csv(energy_path, index=False)
+        logger.info(f"✅ Saved RAW energy → {energy_path}")
+    except Exception as e:
+        logger.error(f"Error fetching energy for {name}: {e}")
+        manifest.mark(slug, "fetched", FAILED, fetch_fp, error=str(e))
+        return False  # skip processing if energy fails
+
+    manifest.invalidate(slug, ("processed", "reported"))
+    manifest.mark(slug, "fetched", DONE, fetch_fp,
+                  outputs=[weather_path, energy_path],
+                  details={"window_end": datetime.utcnow().date().isoformat()})
+    return True
+
+def process_city(city: dict, raw_dir: Path, proc_dir: Path,
+                 manifest: RunManifest, resume: bool, logger) -> bool:
+    """
+    Clean & merge one city's raw files, skipping it when `resume` is set
+    and the raw inputs are unchanged since the last processing.
+    """
+    import pandas as pd
+    from data_processor import clean_weather, clean_energy, merge_weather_energy
+
+    name = city["name"]
+    slug = city_slug(name)
+    weather_path = raw_dir / f"{slug}_weather.csv"
+    energy_path  = raw_dir / f"{slug}_energy.csv"
+    proc_path    = proc_dir / f"{slug}.csv"
+
+    raw_fp = fingerprint_files([weather_path, energy_path])
+    if raw_fp is None:
+        logger.error(f"No raw data for {name}; run `fetch` first")
+        return False
+    if resume and manifest.is_done(slug, "processed", raw_fp):
+        logger.info(f"⏭️ Skipping processing for {name} (up to date)")
+        return True
+    try:
+        cw = clean_weather(pd.read_csv(weather_path))
+        ce = clean_energy(pd.read_csv(energy_path))
+        df_combined = merge_weather_energy(cw, ce)
+        df_combined.to_csv(proc_path, index=False)
+        logger.info(f"✅ Saved PROCESSED data → {proc_path}")
+    except Exception as e:
+        logger.error(f"Error processing data for {name}: {e}")
+        manifest.mark(slug, "processed", FAILED, raw_fp, error=str(e))
+        return False
+    manifest.mark(slug, "processed", DONE, raw_fp, outputs=[proc_path])
+    return True
+
+def run_report(cities: list, raw_dir: Path, qr_path: Path,
+               manifest: RunManifest, incremental: bool, logger):
+    """
+    Write the data quality report. A full run rebuilds it from every raw
+    file; an incremental run only re-analyses the selected cities whose raw
+    inputs changed and merges them into the existing report.
+    """
+    from data_quality_report import analyze_city, generate_report
+
+    if not incremental:
+        report = generate_report(raw_dir)
+        qr_path.write_text(json.dumps(report, indent=2))
+        for city in cities:
+            slug = city_slug(city["name"])
+            if slug in report:
+                raw_fp = fingerprint_files([raw_dir / f"{slug}_weather.csv",
+                                            raw_dir / f"{slug}_energy.csv"])
+                manifest.mark(slug, "reported", DONE, raw_fp, outputs=[qr_path])
+        logger.info(f"✅ Data quality report saved → {qr_path}")
+        return
+
+    report = json.loads(qr_path.read_text()) if qr_path.exists() else {}
+    changed = []
+    for city in cities:
+        slug = city_slug(city["name"])
+        raw_fp = fingerprint_files([raw_dir / f"{slug}_weather.csv",
+                                    raw_dir / f"{slug}_energy.csv"])
+        if raw_fp is None or manifest.is_done(slug, "reported", raw_fp):
+            continue
+        report[slug] = analyze_city(slug, raw_dir)
+        changed.append((slug, raw_fp))
 
-    raw_dir = Path("data/raw")
+    if not changed:
+        logger.info("⏭️ Data quality report up to date")
+        return
+    qr_path.write_text(json.dumps(report, indent=2))
+    for slug, raw_fp in changed:
+        manifest.mark(slug, "reported", DONE, raw_fp, outputs=[qr_path])
+    logger.info(f"✅ Data quality report updated for {len(changed)} "
+                f"cities → {qr_path}")
+
+def _prepare(config: dict, data_dir: Path, only):
+    raw_dir = data_dir / "raw"
     raw_dir.mkdir(parents=True, exist_ok=True)
-    proc_dir = Path("data/processed")
+    proc_dir = data_dir / "processed"
     proc_dir.mkdir(parents=True, exist_ok=True)
+    manifest = RunManifest.load(data_dir / "run_manifest.json")
+    return raw_dir, proc_dir, manifest, select_cities(config["cities"], only)
+
+def run_fetch(config: dict, data_dir: Path = Path("data"),
+              resume: bool = False, only=None, logger=None,
+              refresh: bool = False) -> RunManifest:
+    logger = logger or logging.getLogger(__name__)
+    raw_dir, _, manifest, cities = _prepare(config, data_dir, only)
+    for city in cities:
+        fetch_city(city, config, raw_dir, manifest, resume, logger, refresh)
+    return manifest
+
+def run_process(config: dict, data_dir: Path = Path("data"),
+                resume: bool = False, only=None, logger=None) -> RunManifest:
+    logger = logger or logging.getLogger(__name__)
+    raw_dir, proc_dir, manifest, cities = _prepare(config, data_dir, only)
+    for city in cities:
+        process_city(city, raw_dir, proc_dir, manifest, resume, logger)
+    return manifest
+
+def run_report_only(config: dict, data_dir: Path = Path("data"),
+                    resume: bool = False, only=None, logger=None) -> RunManifest:
+    logger = logger or logging.getLogger(__name__)
+    raw_dir, _, manifest, cities = _prepare(config, data_dir, only)
+    run_report(cities, raw_dir, data_dir / "quality_report.json",
+               manifest, incremental=resume or bool(only), logger=logger)
+    return manifest
+
+def run_publish(config: dict, data_dir: Path = Path("data"),
+                resume: bool = False, only=None, logger=None):
+    """
+    Publish every processed city as a new memory-mapped Arrow version.
+    The published set always covers all configured cities, even with --only.
+    """
+    import pandas as pd
+    from shared_dataset import publish
+
+    logger = logger or logging.getLogger(__name__)
+    proc_dir = data_dir / "processed"
+    frames = {}
+    for city in config["cities"]:
+        path = proc_dir / f"{city_slug(city['name'])}.csv"
+        if path.exists():
+            frames[path.stem] = pd.read_csv(path, parse_dates=["date"])
+    version = publish(frames, data_dir / "shared")
+    if not frames:
+        logger.warning(f"⚠️ No processed data to publish; keeping version {version}")
+        return version
+    logger.info(f"✅ Published {len(frames)} cities → {data_dir / 'shared'} "
+                f"(version {version})")
+    return version
+
+def run_features(config: dict, data_dir: Path = Path("data"),
+                 resume: bool = False, only=None, logger=None):
+    """
+    Update the degree-day feature store from the processed files. With
+    --resume/--only the selected cities are recomputed (revised days
+    included) and the others are kept; a plain run rebuilds it.
+    """
+    import pandas as pd
+    from feature_store import update_features
+
+    logger = logger or logging.getLogger(__name__)
+    proc_dir = data_dir / "processed"
+    frames = {}
+    for city in select_cities(config["cities"], only):
+        path = proc_dir / f"{city_slug(city['name'])}.csv"
+        if path.exists():
+            frames[path.stem] = pd.read_csv(path, parse_dates=["date"])
+    out = data_dir / "features.feather"
+    feats = update_features(frames, out, full=not (resume or only))
+    logger.info(f"✅ Feature store updated ({len(feats)} rows) → {out}")
+    return feats
+
+def run_pipeline(config: dict, data_dir: Path = Path("data"),
+                 resume: bool = False, only=None, logger=None,
+                 refresh: bool = False) -> RunManifest:
+    logger = logger or logging.getLogger(__name__)
+    raw_dir, proc_dir, manifest, cities = _prepare(config, data_dir, only)
 
     logger.info("🔄 Starting pipeline")
 
     # --- Fetch, Save, Process per City ---
-    for city in config["cities"]:
-        name        = city["name"]
-        station_id  = city["station_id"]
-        region_code = city["region"]
-        slug        = name.lower().replace(" ", "_")
-
-        # 1) Weather
-        logger.info(f"🌡️ Fetching weather for {name}")
-        try:
-            df_w = fetch_historical_weather(
-                station_id=station_id,
-                days=92,
-                token=config["noaa_token"]
-            )
-            weather_path = raw_dir / f"{slug}_weather.csv"
-            df_w.to_csv(weather_path, index=False)
-            logger.info(f"✅ Saved RAW weather → {weather_path}")
-        except Exception as e:
-            logger.error(f"Error fetching weather for {name}: {e}")
-            continue  # skip processing if weather fails
-
-        # 2) Energy
-        logger.info(f"⚡ Fetching energy for {name}")
-        try:
-            df_e = fetch_historical_energy(
-                region=region_code,
-                days=92,
-                api_key=config["eia_key"]
-            )
-            energy_path = raw_dir / f"{slug}_energy.csv"
-            df_e.to_csv(energy_path, index=False)
-            logger.info(f"✅ Saved RAW energy → {energy_path}")
-        except Exception as e:
-            logger.error(f"Error fetching energy for {name}: {e}")
-            continue  # skip processing if energy fails
-
-        # 3) Clean & merge
-        try:
-            cw = clean_weather(df_w)
-            ce = clean_energy(df_e)
-            df_combined = merge_weather_energy(cw, ce)
-            proc_path = proc_dir / f"{slug}.csv"
-            df_combined.to_csv(proc_path, index=False)
-            logger.info(f"✅ Saved PROCESSED data → {proc_path}")
-        except Exception as e:
-            logger.error(f"Error processing data for {name}: {e}")
+    for city in cities:
+        if fetch_city(city, config, raw_dir, manifest, resume, logger, refresh):
+            process_city(city, raw_dir, proc_dir, manifest, resume, logger)
 
     # --- Data Quality Report (runs once) ---
     try:
-        report = generate_report()
-        qr_path = Path("data") / "quality_report.json"
-        qr_path.write_text(json.dumps(report, indent=2))
-        logger.info(f"✅ Data quality report saved → {qr_path}")
+        run_report(cities, raw_dir, data_dir / "quality_report.json",
+                   manifest, incremental=resume or bool(only), logger=logger)
     except Exception as e:
         logger.error(f"Error generating quality report: {e}")
 
+    # --- Feature store ---
+    try:
+        run_features(config, data_dir, resume=resume, only=only, logger=logger)
+    except Exception as e:
+        logger.error(f"Error updating feature store: {e}")
+
+    # --- Shared dataset for dashboards/workers ---
+    try:
+        run_publish(config, data_dir, logger=logger)
+    except Exception as e:
+        logger.error(f"Error publishing shared dataset: {e}")
+
     logger.info("✅ Pipeline finished")
+    return manifest
+
+# --- Stage graph ------------------------------------------------------------
+# Each stage reads and writes files only, so the graph can hash its inputs.
+
+def _fetch_weather_stage(station_id: str, days: int, token: str, out: Path):
+    import data_fetcher
+    df_w = data_fetcher.fetch_historical_weather(station_id=station_id, days=days, token=token)
+    df_w.to_csv(out, index=False)
+
+def _fetch_energy_stage(region: str, days: int, api_key: str, out: Path):
+    import data_fetcher
+    df_e = data_fetcher.fetch_historical_energy(region=region, days=days, api_key=api_key)
+    df_e.to_csv(out, index=False)
+
+def _clean_stage(weather_in: Path, energy_in: Path,
+                 weather_out: Path, energy_out: Path):
+    import pandas as pd
+    from data_processor import clean_weather, clean_energy
+    clean_weather(pd.read_csv(weather_in)).to_csv(weather_out, index=False)
+    clean_energy(pd.read_csv(energy_in)).to_csv(energy_out, index=False)
+
+def _merge_stage(weather_in: Path, energy_in: Path, out: Path):
+    import pandas as pd
+    from data_processor import merge_weather_energy
+    cw = pd.read_csv(weather_in, parse_dates=["date"])
+    ce = pd.read_csv(energy_in, parse_dates=["date"])
+    merge_weather_energy(cw, ce).to_csv(out, index=False)
+
+def _existing(paths: dict) -> dict:
+    """Keep the cities whose file exists; failed upstream cities are skipped."""
+    return {slug: path for slug, path in paths.items() if Path(path).exists()}
+
+def _quality_stage(slugs: list, raw_dir: Path, out: Path):
+    from data_quality_report import analyze_city
+    report = {slug: analyze_city(slug, raw_dir) for slug in slugs
+              if (raw_dir / f"{slug}_weather.csv").exists()
+              and (raw_dir / f"{slug}_energy.csv").exists()}
+    out.write_text(json.dumps(report, indent=2))
+
+def _aggregates_stage(processed: dict, out: Path):
+    import pandas as pd
+    import analysis
+    aggregates = {}
+    for slug, path in _existing(processed).items():
+        df = pd.read_csv(path, parse_dates=["date"])
+        aggregates[slug] = {
+            "rows":             len(df),
+            "corr_tmax_demand": analysis.compute_correlation(df),
+            "weekday_weekend":  analysis.weekday_vs_weekend(df),
+        }
+    out.write_text(json.dumps(aggregates, indent=2, default=float))
+
+def _features_stage(processed: dict, out: Path):
+    import pandas as pd
+    from feature_store import update_features
+    # Content hashing already decides when to rerun, and a refetch can revise
+    # past days, so rebuild rather than only appending newer days
+    update_features({slug: pd.read_csv(path, parse_dates=["date"])
+                     for slug, path in _existing(processed).items()}, out, full=True)
+
+def _publish_stage(processed: dict, root: Path):
+    import pandas as pd
+    from shared_dataset import publish
+    publish({slug: pd.read_csv(path, parse_dates=["date"])
+             for slug, path in _existing(processed).items()}, root)
+
+def build_graph(config: dict, data_dir: Path = Path("data"), only=None,
+                logger=None, refresh: bool = False):
+    """
+    Build the fetch_weather → clean → merge → quality/aggregates/features/publish
+    graph.
+    Per-city nodes are named '<stage>[<slug>]' and are limited to `only`.
+    The global quality/aggregates/features/publish nodes always cover every
+    configured city and treat per-city files as optional, so one failed city
+    does not stop them.
+    """
+    # Imported for their source, which is part of each stage's hash
+    import analysis
+    import data_fetcher
+    import data_processor
+    import data_quality_report
+    import feature_store
+    import shared_dataset
+    from stage_graph import Stage, StageGraph
+
+    raw_dir     = data_dir / "raw"
+    interim_dir = data_dir / "interim"
+    proc_dir    = data_dir / "processed"
+    for d in (raw_dir, interim_dir, proc_dir):
+        d.mkdir(parents=True, exist_ok=True)
+
+    graph = StageGraph(data_dir / "stage_cache.json", logger=logger)
+    # Fetches are reused while fresh enough; --refresh forces new ones
+    max_age = config.get("fetch_max_age_days", FETCH_MAX_AGE_DAYS)
+    slugs, processed = [], {}
+
+    for city in select_cities(config["cities"], only):
+        slug = city_slug(city["name"])
+        weather_raw   = raw_dir / f"{slug}_weather.csv"
+        energy_raw    = raw_dir / f"{slug}_energy.csv"
+        weather_clean = interim_dir / f"{slug}_weather.csv"
+        energy_clean  = interim_dir / f"{slug}_energy.csv"
+        proc_path     = proc_dir / f"{slug}.csv"
+
+        # Secrets are passed to the stage but kept out of the hashed params
+        graph.add(Stage(
+            f"fetch_weather[{slug}]",
+            partial(_fetch_weather_stage, city["station_id"], FETCH_DAYS,
+                    config["noaa_token"], weather_raw),
+            outputs=[weather_raw],
+            params={"station_id": city["station_id"], "days": FETCH_DAYS},
+            code=[_fetch_weather_stage, data_fetcher],
+            max_age_days=max_age,
+            force=refresh,
+        ))
+        graph.add(Stage(
+            f"fetch_energy[{slug}]",
+            partial(_fetch_energy_stage, city["region"], FETCH_DAYS,
+                    config["eia_key"], energy_raw),
+            outputs=[energy_raw],
+            params={"region": city["region"], "days": FETCH_DAYS},
+            code=[_fetch_energy_stage, data_fetcher],
+            max_age_days=max_age,
+            force=refresh,
+        ))
+        graph.add(Stage(
+            f"clean[{slug}]",
+            partial(_clean_stage, weather_raw, energy_raw, weather_clean, energy_clean),
+            inputs=[weather_raw, energy_raw],
+            outputs=[weather_clean, energy_clean],
+            code=[_clean_stage, data_processor.clean_weather,
+                  data_processor.clean_energy, data_processor.resample_numeric],
+        ))
+        graph.add(Stage(
+            f"merge[{slug}]",
+            partial(_merge_stage, weather_clean, energy_clean, proc_path),
+            inputs=[weather_clean, energy_clean],
+            outputs=[proc_path],
+            code=[_merge_stage, data_processor.merge_weather_energy],
+        ))
+        slugs.append(slug)
+        processed[slug] = proc_path
+
+    all_slugs = [city_slug(c["name"]) for c in config["cities"]]
+    all_processed = {s: proc_dir / f"{s}.csv" for s in all_slugs}
+
+    qr_path = data_dir / "quality_report.json"
+    graph.add(Stage(
+        "quality",
+        partial(_quality_stage, all_slugs, raw_dir, qr_path),
+        optional_inputs=[raw_dir / f"{s}_{kind}.csv"
+                         for s in all_slugs for kind in ("weather", "energy")],
+        outputs=[qr_path],
+        params={"cities": all_slugs},
+        code=[_quality_stage, data_quality_report],
+    ))
+    graph.add(Stage(
+        "aggregates",
+        partial(_aggregates_stage, all_processed, data_dir / "aggregates.json"),
+        optional_inputs=list(all_processed.values()),
+        outputs=[data_dir / "aggregates.json"],
+        params={"cities": all_slugs},
+        code=[_aggregates_stage, analysis],
+    ))
+    graph.add(Stage(
+        "features",
+        partial(_features_stage, all_processed, data_dir / "features.feather"),
+        optional_inputs=list(all_processed.values()),
+        outputs=[data_dir / "features.feather"],
+        params={"cities": all_slugs},
+        code=[_features_stage, feature_store],
+    ))
+    graph.add(Stage(
+        "publish",
+        # Like run_publish: always every configured city, even with --only
+        partial(_publish_stage, all_processed, data_dir / "shared"),
+        optional_inputs=list(all_processed.values()),
+        outputs=[data_dir / "shared" / "CURRENT"],
+        params={"cities": all_slugs},
+        code=[_publish_stage, shared_dataset],
+    ))
+    return graph
+
+def _record_graph_run(graph, status: dict, config: dict, data_dir: Path, only):
+    """
+    Mirror the graph's fetch/merge/quality results into the run manifest so
+    a later sequential `--resume` run does not redo them.
+    """
+    from stage_graph import RAN, SKIPPED
+
+    raw_dir  = data_dir / "raw"
+    proc_dir = data_dir / "processed"
+    qr_path  = data_dir / "quality_report.json"
+    manifest = RunManifest.load(data_dir / "run_manifest.json")
+    ok = (RAN, SKIPPED)
+
+    for city in select_cities(config["cities"], only):
+        slug = city_slug(city["name"])
+        raw = [raw_dir / f"{slug}_weather.csv", raw_dir / f"{slug}_energy.csv"]
+        fetches = [f"fetch_weather[{slug}]", f"fetch_energy[{slug}]"]
+        fetch_fp = fetch_fingerprint(city, FETCH_DAYS)
+        if all(status[n] in ok for n in fetches):
+            if any(status[n] == RAN for n in fetches):
+                manifest.invalidate(slug, ("processed", "reported"))
+            # The older of the two fetches bounds how fresh the raw data is
+            manifest.mark(slug, "fetched", DONE, fetch_fp, outputs=raw,
+                          details={"window_end": min(graph.ran_at(n) for n in fetches)})
+        else:
+            manifest.mark(slug, "fetched", FAILED, fetch_fp,
+                          error="stage graph fetch failed")
+
+        raw_fp = fingerprint_files(raw)
+        if status[f"merge[{slug}]"] in ok:
+            manifest.mark(slug, "processed", DONE, raw_fp,
+                          outputs=[proc_dir / f"{slug}.csv"])
+        elif raw_fp is not None:
+            manifest.mark(slug, "processed", FAILED, raw_fp,
+                          error=f"stage graph merge {status[f'merge[{slug}]']}")
+
+    # The quality node rebuilds the full report, like a non-incremental run
+    if status["quality"] in ok:
+        for city in config["cities"]:
+            slug = city_slug(city["name"])
+            raw_fp = fingerprint_files([raw_dir / f"{slug}_weather.csv",
+                                        raw_dir / f"{slug}_energy.csv"])
+            if raw_fp is not None:
+                manifest.mark(slug, "reported", DONE, raw_fp, outputs=[qr_path])
+
+def run_graph(config: dict, data_dir: Path = Path("data"), only=None,
+              workers: int = 4, logger=None, refresh: bool = False) -> dict:
+    """
+    Run the pipeline as a cached stage graph. The graph decides what to rerun
+    from its own cache (stage_cache.json); its fetch, merge and quality
+    results are also recorded in run_manifest.json so a later sequential
+    `--resume` run reuses them. The reverse does not hold: a sequential run
+    does not seed the graph cache, so the next `--dag` run recomputes.
+    """
+    logger = logger or logging.getLogger(__name__)
+    logger.info("🔄 Starting pipeline (stage graph)")
+    graph = build_graph(config, data_dir, only, logger, refresh)
+    status = graph.run(workers)
+    _record_graph_run(graph, status, config, data_dir, only)
+    logger.info("✅ Pipeline finished: " + ", ".join(
+        f"{n} {list(status.values()).count(n)}"
+        for n in ("ran", "skipped", "failed", "blocked")))
+    return status
+
+# --- CLI ----------------------------------------------------------------------
+
+COMMANDS = {
+    "fetch":    run_fetch,
+    "process":  run_process,
+    "report":   run_report_only,
+    "features": run_features,
+    "publish":  run_publish,
+    "run":      run_pipeline,
+}
+
+def _add_options(parser, stage: bool = True, dag: bool = False,
+                 suppress: bool = False):
+    """
+    Add shared options. Subcommands pass `suppress` so an option given before
+    the subcommand name is not reset to its default by the subparser.
+    """
+    default = (lambda v: argparse.SUPPRESS) if suppress else (lambda v: v)
+    parser.add_argument("--config", default=default("config/config.yaml"),
+                        help="path to the YAML config")
+    if stage:
+        parser.add_argument("--resume", action="store_true", default=default(False),
+                            help="skip stages already completed for unchanged inputs")
+        parser.add_argument("--only", default=default(None),
+                            help="comma-separated city names or slugs to (re)run")
+        parser.add_argument("--refresh", action="store_true", default=default(False),
+                            help="refetch even if the last fetch is still fresh")
+    if dag:
+        parser.add_argument("--dag", action="store_true", default=default(False),
+                            help="run as a cached stage graph instead of city by city")
+        parser.add_argument("--workers", type=int, default=default(4),
+                            help="parallel workers for --dag")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Weather + energy pipeline")
+    _add_options(parser, dag=True)
+
+    sub = parser.add_subparsers(dest="command")
+    _add_options(sub.add_parser("validate", help="check the config without "
+                                "importing the data stack"),
+                 stage=False, suppress=True)
+    _add_options(sub.add_parser("fetch", help="fetch raw weather & energy"),
+                 suppress=True)
+    _add_options(sub.add_parser("process", help="clean & merge raw files"),
+                 suppress=True)
+    _add_options(sub.add_parser("report", help="write the data quality report"),
+                 suppress=True)
+    _add_options(sub.add_parser("features", help="update the degree-day "
+                                "feature store"),
+                 suppress=True)
+    _add_options(sub.add_parser("publish", help="publish processed data as "
+                                "memory-mapped Arrow files"),
+                 suppress=True)
+    _add_options(sub.add_parser("run", help="fetch, process, report and publish"),
+                 dag=True, suppress=True)
+
+    args = parser.parse_args(argv)
+    # No subcommand keeps `python src/pipeline.py [--resume] ...` working
+    args.command = args.command or "run"
+    if args.dag and args.command != "run":
+        parser.error(f"--dag only applies to `run`, not `{args.command}`")
+    if args.dag and args.resume:
+        parser.error("--dag always reuses cached stages; drop --resume")
+    args.only = args.only.split(",") if args.only else None
+    return args
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    config = load_config(args.config)
+
+    if args.command == "validate":
+        problems = validate_config(config)
+        for p in problems:
+            print(f"❌ {p}")
+        if not problems:
+            print(f"✅ {args.config} is valid ({len(config.get('cities') or [])} cities)")
+        return 1 if problems else 0
+
+    logs_dir = Path("logs")
+    logs_dir.mkdir(exist_ok=True)
+    logger = setup_logging(logs_dir / "pipeline.log")
+
+    if args.command == "run" and args.dag:
+        run_graph(config, only=args.only, workers=args.workers, logger=logger,
+                  refresh=args.refresh)
+    else:
+        # Only the commands that fetch take --refresh
+        extra = {"refresh": args.refresh} if args.command in ("fetch", "run") else {}
+        COMMANDS[args.command](config, resume=args.resume, only=args.only,
+                               logger=logger, **extra)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+src/run_manifest.py
+Per-city stage tracking so pipeline runs can be resumed after a failure.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+STAGES = ("fetched", "processed", "reported")
+
+DONE   = "done"
+FAILED = "failed"
+
+
+def fingerprint_obj(obj) -> str:
+    """Return a stable sha256 of a JSON-serialisable object."""
+    blob = json.dumps(obj, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def fingerprint_files(paths: Iterable[Path]) -> Optional[str]:
+    """Return a sha256 over the contents of `paths`, or None if any is missing."""
+    h = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        if not path.exists():
+            return None
+        h.update(path.name.encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class RunManifest:
+    """
+    JSON manifest recording, for every city, the status of each stage
+    together with the input fingerprint it ran against and the files it wrote.
+
+    Layout:
+        {"cities": {"<slug>": {"<stage>": {"status": ..., "fingerprint": ...,
+                                            "outputs": [...], "updated": ...,
+                                            "error": ...}}}}
+    """
+
+    def __init__(self, path: Path, data: Optional[dict] = None):
+        self.path = Path(path)
+        self.data = data if data is not None else {"cities": {}}
+
+    @classmethod
+    def load(cls, path: Path) -> "RunManifest":
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        try:
+            data = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            # A corrupt manifest only costs us a full rerun
+            return cls(path)
+        data.setdefault("cities", {})
+        return cls(path, data)
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves it half-written."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.data, indent=2))
+        os.replace(tmp, self.path)
+
+    def stage(self, slug: str, stage: str) -> Dict:
+        return self.data["cities"].get(slug, {}).get(stage, {})
+
+    def mark(self, slug: str, stage: str, status: str,
+             fingerprint: Optional[str] = None,
+             outputs: Iterable[Path] = (),
+             error: Optional[str] = None,
+             details: Optional[dict] = None):
+        """
+        Record the outcome of `stage` for `slug` and persist immediately.
+        `details` holds extra JSON-serialisable fields, e.g. a fetch window.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        entry = {
+            "status":      status,
+            "fingerprint": fingerprint,
+            "outputs":     [str(p) for p in outputs],
+            "updated":     datetime.utcnow().isoformat(timespec="seconds"),
+        }
+        if error is not None:
+            entry["error"] = error
+        if details:
+            entry.update(details)
+        self.data["cities"].setdefault(slug, {})[stage] = entry
+        self.save()
+
+    def invalidate(self, slug: str, stages: Iterable[str]):
+        """Drop downstream stages whose inputs have just been replaced."""
+        city = self.data["cities"].get(slug, {})
+        for stage in stages:
+            city.pop(stage, None)
+
+    def is_done(self, slug: str, stage: str, fingerprint: Optional[str]) -> bool:
+        """
+        True when `stage` completed for `slug` against the same input
+        fingerprint and every output it recorded is still on disk.
+        """
+        entry = self.stage(slug, stage)
+        if entry.get("status") != DONE or fingerprint is None:
+            return False
+        if entry.get("fingerprint") != fingerprint:
+            return False
+        return all(Path(p).exists() for p in entry.get("outputs", []))
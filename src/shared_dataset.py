@@ -0,0 +1,127 @@
+"""
+src/shared_dataset.py
+Publish processed city data as memory-mapped Arrow IPC files.
+
+Layout under `root` (default data/shared/):
+    versions/<version>/<slug>.arrow   one uncompressed IPC file per city
+    CURRENT                           name of the live version
+
+Writers build a new version directory and then atomically replace CURRENT,
+so readers either see the old version or the new one, never a partial one.
+Readers map the files read-only; the OS page cache is shared by every
+process on the host, so N dashboards/workers cost one copy of the data.
+
+pandas and pyarrow are imported inside the functions that use them, so
+checking `current_version` stays stdlib-only.
+"""
+
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+SHARED_DIR = Path("data/shared")
+CURRENT    = "CURRENT"
+
+
+def publish(frames: Dict[str, "pd.DataFrame"], root: Path = SHARED_DIR,
+            keep: int = 3) -> Optional[str]:
+    """
+    Write `frames` ({slug: DataFrame}) as a new version and make it current.
+    Keeps the `keep` newest versions; older ones are removed (readers that
+    still map them keep working on POSIX until they unmap).
+
+    Returns:
+        The new version name. With no frames nothing is written and the
+        current version (None if there is none) is returned unchanged.
+    """
+    root = Path(root)
+    if not frames:
+        # Never make an empty version live; readers fall back or keep the old one
+        return current_version(root)
+
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    versions = root / "versions"
+    versions.mkdir(parents=True, exist_ok=True)
+
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    staging = versions / f".tmp-{version}-{os.getpid()}"
+    staging.mkdir()
+    try:
+        for slug, df in frames.items():
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            # No compression: compressed buffers cannot be mapped zero-copy
+            with pa.OSFile(str(staging / f"{slug}.arrow"), "wb") as sink:
+                with ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        os.rename(staging, versions / version)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    tmp = root / f"{CURRENT}.tmp-{os.getpid()}"
+    tmp.write_text(version)
+    os.replace(tmp, root / CURRENT)
+
+    _prune(versions, keep, live=version)
+    return version
+
+
+def _prune(versions: Path, keep: int, live: str):
+    names = sorted(p.name for p in versions.iterdir()
+                   if p.is_dir() and not p.name.startswith("."))
+    for name in names[:-keep] if keep > 0 else names:
+        if name != live:
+            shutil.rmtree(versions / name, ignore_errors=True)
+
+
+def current_version(root: Path = SHARED_DIR) -> Optional[str]:
+    """Name of the live version, or None if nothing has been published."""
+    try:
+        return (Path(root) / CURRENT).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def open_tables(root: Path = SHARED_DIR, version: Optional[str] = None,
+                columns: Optional[Iterable[str]] = None) -> Dict[str, "pa.Table"]:
+    """
+    Memory-map every city table of `version` (default: current).
+    The returned tables reference the mapped pages directly; no data is read
+    until a column is touched.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    root = Path(root)
+    version = version or current_version(root)
+    if version is None:
+        return {}
+    tables = {}
+    for path in sorted((root / "versions" / version).glob("*.arrow")):
+        table = ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        tables[path.stem] = table
+    return tables
+
+
+def load_frames(root: Path = SHARED_DIR, version: Optional[str] = None,
+                columns: Optional[Iterable[str]] = None) -> Dict[str, "pd.DataFrame"]:
+    """
+    Like open_tables, but as DataFrames. `split_blocks` lets pandas wrap
+    null-free numeric/datetime columns around the mapped buffers instead of
+    copying them; string columns are still materialised, so pass `columns`
+    to skip the ones you do not need.
+    """
+    return {
+        slug: table.to_pandas(split_blocks=True)
+        for slug, table in open_tables(root, version, columns).items()
+    }
@@ -0,0 +1,226 @@
+"""
+src/stage_graph.py
+Lightweight stage graph: nodes declare inputs/outputs, are content-hashed
+and skipped when nothing they depend on has changed.
+"""
+
+import inspect
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from run_manifest import fingerprint_obj, fingerprint_files
+
+RAN     = "ran"
+SKIPPED = "skipped"
+FAILED  = "failed"
+BLOCKED = "blocked"
+
+
+def _source_of(obj) -> str:
+    """Source text of a function/module, falling back to its qualified name."""
+    func = getattr(obj, "func", obj)  # unwrap functools.partial
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+class Stage:
+    """
+    One node of the graph.
+
+    Args:
+        name: Unique node name, e.g. 'clean[chicago]'
+        func: Callable run with no arguments; must write every path in `outputs`
+        inputs: Files the node reads (produced upstream or already on disk)
+        optional_inputs: Files read only when present; a missing file or a
+              failed producer does not block the node. Used by nodes that
+              combine many cities, so one failed city does not stop them
+        outputs: Files the node writes
+        params: Extra JSON-serialisable values that affect the result
+        code: Functions/modules whose source is part of the node's hash;
+              defaults to `func` itself
+        max_age_days: Rerun once the last run is older than this many days
+              even if nothing changed (for stages reading external sources)
+        force: Rerun even if the cache says the node is up to date
+    """
+
+    def __init__(self, name: str, func: Callable,
+                 inputs: Iterable[Path] = (), outputs: Iterable[Path] = (),
+                 params: Optional[dict] = None, code: Iterable = (),
+                 max_age_days: Optional[int] = None,
+                 optional_inputs: Iterable[Path] = (),
+                 force: bool = False):
+        self.name    = name
+        self.func    = func
+        self.inputs  = [Path(p) for p in inputs]
+        self.optional_inputs = [Path(p) for p in optional_inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.params  = params or {}
+        self.code    = list(code) or [func]
+        self.max_age_days = max_age_days
+        self.force = force
+
+    def fingerprint(self) -> Optional[str]:
+        """
+        Hash of code, params and input contents; None if a required input is
+        missing. Missing optional inputs are hashed as absent.
+        """
+        inputs = {}
+        for path in self.inputs:
+            fp = fingerprint_files([path])
+            if fp is None:
+                return None
+            inputs[str(path)] = fp
+        for path in self.optional_inputs:
+            inputs[str(path)] = fingerprint_files([path])
+        return fingerprint_obj({
+            "code":   [_source_of(c) for c in self.code],
+            "params": self.params,
+            "inputs": inputs,
+        })
+
+
+class StageGraph:
+    """
+    Runs stages in dependency order on a worker pool. A stage depends on
+    every stage that produces one of its inputs or optional inputs, but is
+    only blocked by failures of the producers of its required inputs.
+    Results are cached in a JSON file keyed by stage name.
+    """
+
+    def __init__(self, cache_path: Path, logger=None):
+        self.cache_path = Path(cache_path)
+        self.logger = logger or logging.getLogger(__name__)
+        self.stages: Dict[str, Stage] = {}
+        self._lock = threading.Lock()
+        self._cache = self._load_cache()
+
+    def add(self, stage: Stage) -> Stage:
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage: {stage.name}")
+        self.stages[stage.name] = stage
+        return stage
+
+    def dependencies(self, required_only: bool = False) -> Dict[str, List[str]]:
+        producers = {}
+        for stage in self.stages.values():
+            for path in stage.outputs:
+                if path in producers:
+                    raise ValueError(f"{path} is produced by both "
+                                     f"{producers[path]} and {stage.name}")
+                producers[path] = stage.name
+        deps = {}
+        for stage in self.stages.values():
+            paths = stage.inputs if required_only else stage.inputs + stage.optional_inputs
+            deps[stage.name] = sorted({producers[p] for p in paths if p in producers})
+        return deps
+
+    def run(self, workers: int = 4) -> Dict[str, str]:
+        """Execute the graph and return {stage name: RAN/SKIPPED/FAILED/BLOCKED}."""
+        deps = self.dependencies()
+        required = self.dependencies(required_only=True)
+        self._check_acyclic(deps)
+        pending = {name: set(d) for name, d in deps.items()}
+        status: Dict[str, str] = {}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while pending or running:
+                for name in [n for n, d in pending.items() if not d - status.keys()]:
+                    del pending[name]
+                    if any(status[d] in (FAILED, BLOCKED) for d in required[name]):
+                        status[name] = BLOCKED
+                        self.logger.warning(f"⛔ {name} blocked by failed upstream")
+                        continue
+                    running[pool.submit(self._run_stage, self.stages[name])] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    status[running.pop(fut)] = fut.result()
+        return status
+
+    def ran_at(self, name: str) -> Optional[str]:
+        """ISO date of the last successful run of `name`, or None."""
+        with self._lock:
+            return self._cache.get(name, {}).get("ran_at")
+
+    def _run_stage(self, stage: Stage) -> str:
+        fp = stage.fingerprint()
+        if fp is None:
+            self.logger.error(f"❌ {stage.name}: missing inputs")
+            return FAILED
+        if self._is_fresh(stage, fp):
+            self.logger.info(f"⏭️ {stage.name} up to date")
+            return SKIPPED
+        try:
+            stage.func()
+        except Exception as e:
+            self.logger.error(f"❌ {stage.name} failed: {e}")
+            with self._lock:
+                self._cache.pop(stage.name, None)
+                self._save_cache()
+            return FAILED
+        with self._lock:
+            self._cache[stage.name] = {
+                "hash":    fp,
+                "ran_at":  date.today().isoformat(),
+                "outputs": {str(p): fingerprint_files([p]) for p in stage.outputs},
+            }
+            self._save_cache()
+        self.logger.info(f"✅ {stage.name} done")
+        return RAN
+
+    def _is_fresh(self, stage: Stage, fp: str) -> bool:
+        if stage.force:
+            return False
+        with self._lock:
+            entry = self._cache.get(stage.name)
+        if not entry or entry.get("hash") != fp:
+            return False
+        if stage.max_age_days is not None:
+            ran_at = entry.get("ran_at")
+            if ran_at is None:
+                return False
+            if (date.today() - date.fromisoformat(ran_at)).days > stage.max_age_days:
+                return False
+        # Outputs deleted or edited by hand since the last run force a rerun
+        return all(fingerprint_files([p]) == entry["outputs"].get(str(p))
+                   for p in stage.outputs)
+
+    def _check_acyclic(self, deps: Dict[str, List[str]]):
+        state = {}
+
+        def visit(name, trail):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in stage graph: {' -> '.join(trail + [name])}")
+            state[name] = "visiting"
+            for dep in deps[name]:
+                visit(dep, trail + [name])
+            state[name] = "done"
+
+        for name in deps:
+            visit(name, [])
+
+    def _load_cache(self) -> dict:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            return json.loads(self.cache_path.read_text())
+        except json.JSONDecodeError:
+            return {}
+
+    def _save_cache(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self._cache, indent=2))
+        os.replace(tmp, self.cache_path)
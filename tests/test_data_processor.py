@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 from datetime import datetime
-from src.data_processor import clean_weather, clean_energy, merge_weather_energy
+from src.data_processor import clean_weather, clean_energy, merge_weather_energy, resample_numeric
 
 @pytest.fixture
 def sample_weather_data():
@@ -35,4 +35,53 @@ def test_merge_weather_energy(sample_weather_data, sample_energy_data):
     energy = clean_energy(sample_energy_data)
     merged = merge_weather_energy(weather, energy)
     assert len(merged) == 2  # Only matching dates
-    assert set(merged.columns) == {'date', 'TMAX', 'TMIN', 'demand'}
\ No newline at end of file
+    assert set(merged.columns) == {'date', 'TMAX', 'TMIN', 'demand'}
+
+def test_clean_energy_interpolate_with_text_columns():
+    df = pd.DataFrame({
+        'date': ['2025-01-01', '2025-01-01', '2025-01-04'],
+        'respondent-name': ['PJM', 'PJM', 'PJM'],
+        'demand': [1000, 3000, 2600]
+    })
+    out = clean_energy(df, interpolate=True)
+    assert list(out['date']) == list(pd.date_range('2025-01-01', '2025-01-04'))
+    # rows sharing a date are averaged, not deduplicated
+    assert list(out['demand']) == [2000, 2200, 2400, 2600]
+    assert list(out['demand_imputed']) == [False, True, True, False]
+    # text columns are carried into the filled days
+    assert list(out['respondent-name']) == ['PJM'] * 4
+    # same column order as without interpolation, flags appended
+    assert list(out.columns) == ['date', 'respondent-name', 'demand', 'demand_imputed']
+
+def test_resample_numeric_grouped_gap_mask():
+    df = pd.DataFrame({
+        'city': ['a', 'a', 'a', 'b', 'b'],
+        'date': ['2025-01-01', '2025-01-01', '2025-01-05',
+                 '2025-01-02', '2025-01-03'],
+        'demand': [10, 20, 55, 7, 9],
+        'TMAX': [1.0, 1.0, None, 3.0, 4.0],
+    })
+    out, mask = resample_numeric(df, freq='daily', by='city', limit=2)
+
+    a = out[out['city'] == 'a']
+    assert list(a['date']) == list(pd.date_range('2025-01-01', '2025-01-05'))
+    # mean of duplicate rows, then first two missing days filled
+    assert list(a['demand'].iloc[:3]) == [15, 25, 35]
+    assert pd.isna(a['demand'].iloc[3])
+    assert list(mask.loc[a.index, 'demand']) == [False, True, True, False, False]
+    # trailing gaps are not extrapolated
+    assert pd.isna(a['TMAX'].iloc[-1])
+
+    b = out[out['city'] == 'b']
+    assert len(b) == 2
+    assert not mask.loc[b.index].any().any()
+    assert out['demand'].mask(mask['demand']).count() == 4
+
+def test_resample_numeric_weekly_sum():
+    df = pd.DataFrame({
+        'date': pd.date_range('2025-01-06', periods=14, freq='D'),
+        'demand': [1] * 14,
+    })
+    out, mask = resample_numeric(df, freq='weekly', agg='sum')
+    assert list(out['demand']) == [7, 7]
+    assert not mask.values.any()
@@ -0,0 +1,106 @@
+# tests/test_feature_store.py
+
+import pandas as pd
+import pytest
+
+from feature_store import build_features, update_features, load_features
+from analysis import degree_day_correlation, temp_weekday_pivot
+
+def _frame(start, temps, demand):
+    dates = pd.date_range(start, periods=len(temps), freq="D")
+    return pd.DataFrame({
+        "date": dates,
+        "TMAX": [t + 5 for t in temps],
+        "TMIN": [t - 5 for t in temps],
+        "demand": demand,
+    })
+
+@pytest.fixture
+def frames():
+    return {
+        "chicago": _frame("2024-12-30", [40, 60, 75, 80, 70, 55, 65, 85, 90, 50],
+                          [100, 110, 120, 130, 140, 150, 160, 170, 180, 190]),
+        "houston": _frame("2024-12-30", [70, 72, 74, 76, 78],
+                          [10, 20, 30, 40, 50]),
+    }
+
+def test_degree_days_and_calendar(frames):
+    f = build_features(frames)
+    chi = f[f["city"] == "chicago"].reset_index(drop=True)
+    assert chi["temp_avg"].iloc[0] == 40
+    assert chi["hdd"].iloc[0] == 25 and chi["cdd"].iloc[0] == 0
+    assert chi["cdd"].iloc[2] == 10 and chi["hdd"].iloc[2] == 0
+    assert list(chi["is_holiday"].iloc[:3]) == [False, False, True]  # Jan 1
+    assert chi["dayofweek"].iloc[0] == 0  # 2024-12-30 is a Monday
+    assert chi["temp_bin"].iloc[0] == "<50°F"
+
+def test_rolling_and_lags_are_per_city(frames):
+    f = build_features(frames)
+    hou = f[f["city"] == "houston"].reset_index(drop=True)
+    assert pd.isna(hou["demand_lag1"].iloc[0])  # no leak from chicago
+    assert hou["demand_lag1"].iloc[1] == 10
+    assert hou["demand_roll3"].iloc[2] == 20
+    assert hou["demand_roll30"].iloc[4] == 30
+
+def test_lags_use_calendar_days():
+    gap = _frame("2025-03-03", [50, 50, 50], [1, 2, 3]).drop(index=1)
+    f = build_features({"x": gap}).reset_index(drop=True)
+    assert pd.isna(f["demand_lag1"].iloc[1])
+    assert f["demand_roll3"].iloc[1] == 2  # window spans the missing day
+
+def test_compact_dtypes(frames):
+    f = build_features(frames)
+    assert f["hdd"].dtype == "float32"
+    assert f["dayofweek"].dtype == "int8"
+    assert f["city"].dtype == "category"
+    for col in ("demand", "demand_lag1", "demand_lag7", "demand_roll3", "demand_roll30"):
+        assert f[col].dtype == "float64"
+
+def test_demand_lag_is_exact_for_large_totals():
+    big = _frame("2025-03-03", [50, 50], [16_777_217, 16_777_219])
+    f = build_features({"x": big})
+    assert f["demand_lag1"].iloc[1] == 16_777_217  # not representable in float32
+
+def test_incremental_update_matches_full_build(tmp_path, frames):
+    path = tmp_path / "features.feather"
+    update_features({k: v.iloc[:-2] for k, v in frames.items()}, path)
+    inc = update_features(frames, path)
+    pd.testing.assert_frame_equal(inc, build_features(frames))
+    pd.testing.assert_frame_equal(load_features(path), inc)
+
+def test_incremental_update_replaces_revised_days(tmp_path, frames):
+    path = tmp_path / "features.feather"
+    update_features(frames, path)
+
+    revised = frames["chicago"].copy()
+    revised.loc[0, "demand"] = 999
+    feats = update_features({"chicago": revised}, path)
+    pd.testing.assert_frame_equal(feats, build_features({**frames, "chicago": revised}))
+
+def test_incremental_update_keeps_days_before_the_frame(tmp_path, frames):
+    path = tmp_path / "features.feather"
+    update_features(frames, path)
+
+    # a later window no longer holds the first days; they stay in the store
+    # and still feed the lags of the recomputed days
+    feats = update_features({"chicago": frames["chicago"].iloc[3:]}, path)
+    pd.testing.assert_frame_equal(feats, build_features(frames))
+
+def test_analysis_reads_features(frames):
+    f = build_features(frames)
+    pivot = temp_weekday_pivot(f[f["city"] == "houston"])
+    assert pivot.loc["60-70°F", "Monday"] == 10  # bins are right-inclusive
+    assert pivot.shape == (6, 7)
+    r = degree_day_correlation(f)
+    assert set(r) == {"chicago", "houston"}
+    assert r["chicago"]["cdd"] > 0
+
+def test_no_frames_never_writes_empty_store(tmp_path, frames):
+    path = tmp_path / "features.feather"
+    assert update_features({}, path).empty
+    assert not path.exists()
+
+    stored = update_features(frames, path)
+    pd.testing.assert_frame_equal(update_features({}, path), stored)
+    pd.testing.assert_frame_equal(update_features({}, path, full=True), stored)
+    pd.testing.assert_frame_equal(load_features(path), stored)
@@ -0,0 +1,59 @@
+# tests/test_import_time.py
+# Import-time benchmark: cheap CLI paths must not load the data stack.
+
+import subprocess
+import sys
+import time
+
+from conftest import SRC_DIR
+
+HEAVY_MODULES = ("pandas", "numpy", "requests", "plotly")
+
+# Wall-clock budget (seconds) for a fresh interpreter running a cheap path,
+# interpreter startup included. Loose enough for slow CI machines, but well
+# below what importing pandas + requests costs.
+STARTUP_BUDGET_S = 1.5
+
+def _run(code: str) -> tuple:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", f"import sys; sys.path.insert(0, {str(SRC_DIR)!r})\n{code}"],
+        capture_output=True, text=True, check=True,
+    )
+    # the snippet's own report is always its last line of output
+    return time.perf_counter() - start, out.stdout.splitlines()[-1].split()
+
+def test_import_pipeline_is_light():
+    elapsed, loaded = _run(
+        "import pipeline\n"
+        f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    assert loaded == []
+    assert elapsed < STARTUP_BUDGET_S
+
+def test_validate_does_not_load_data_stack(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(
+        "noaa_token: A\n"
+        "eia_key: B\n"
+        "cities:\n"
+        "  - {name: Chicago, station_id: S, region: PJM}\n"
+    )
+    elapsed, out = _run(
+        "import pipeline\n"
+        f"code = pipeline.main(['validate', '--config', {str(cfg)!r}])\n"
+        f"print(code, *[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    # exit code 0 and no heavy modules listed after it
+    assert out == ["0"]
+    assert elapsed < STARTUP_BUDGET_S
+
+def test_current_version_is_stdlib_only(tmp_path):
+    (tmp_path / "CURRENT").write_text("v1")
+    elapsed, out = _run(
+        "import shared_dataset\n"
+        f"version = shared_dataset.current_version({str(tmp_path)!r})\n"
+        f"print(version, *[m for m in {HEAVY_MODULES + ('pyarrow',)!r} if m in sys.modules])"
+    )
+    assert out == ["v1"]
+    assert elapsed < STARTUP_BUDGET_S
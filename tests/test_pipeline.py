@@ -1,13 +1,18 @@
 # tests/test_pipeline.py
 
+import json
 import pytest
 import pandas as pd
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # Now these imports will work, thanks to conftest.py
+import pipeline
 from pipeline import load_config
 from data_processor import clean_weather, clean_energy, merge_weather_energy
+import data_fetcher
 from data_fetcher import fetch_historical_weather
+from shared_dataset import load_frames
 
 def test_load_config(tmp_path):
     cfg = tmp_path / "config.yaml"
@@ -44,3 +49,224 @@ def test_clean_merge():
     # merged only has the overlapping date
     assert merged.shape == (1, 4)   # columns: date, TMAX, TMIN, demand
     assert merged["date"].iloc[0] == pd.to_datetime("2025-01-01")
+
+def _fake_fetchers(monkeypatch, calls, fail_region=None):
+    def weather(station_id, days, token):
+        calls.append(("weather", station_id))
+        return pd.DataFrame({"date": ["2025-01-01", "2025-01-02"],
+                             "TMAX": [50.0, 55.0], "TMIN": [30.0, 35.0]})
+    def energy(region, days, api_key):
+        calls.append(("energy", region))
+        if region == fail_region:
+            raise RuntimeError("quota exceeded")
+        return pd.DataFrame({"date": ["2025-01-01", "2025-01-02"],
+                             "demand": [100, 200]})
+    monkeypatch.setattr(data_fetcher, "fetch_historical_weather", weather)
+    monkeypatch.setattr(data_fetcher, "fetch_historical_energy", energy)
+
+CONFIG = {
+    "noaa_token": "A",
+    "eia_key": "B",
+    "cities": [
+        {"name": "New York", "station_id": "S1", "region": "NYIS"},
+        {"name": "Chicago",  "station_id": "S2", "region": "PJM"},
+    ],
+}
+
+def test_resume_only_reruns_failed_city(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls, fail_region="PJM")
+    manifest = pipeline.run_pipeline(CONFIG, data_dir=tmp_path)
+    assert manifest.stage("chicago", "fetched")["status"] == "failed"
+    assert manifest.stage("new_york", "processed")["status"] == "done"
+
+    calls.clear()
+    _fake_fetchers(monkeypatch, calls)
+    manifest = pipeline.run_pipeline(CONFIG, data_dir=tmp_path, resume=True)
+    assert calls == [("weather", "S2"), ("energy", "PJM")]
+    assert (tmp_path / "processed" / "chicago.csv").exists()
+    report = json.loads((tmp_path / "quality_report.json").read_text())
+    assert set(report) == {"new_york", "chicago"}
+
+    calls.clear()
+    pipeline.run_pipeline(CONFIG, data_dir=tmp_path, resume=True)
+    assert calls == []
+
+def test_only_restricts_cities(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls)
+    pipeline.run_pipeline(CONFIG, data_dir=tmp_path, only=["new york"])
+    assert calls == [("weather", "S1"), ("energy", "NYIS")]
+    assert not (tmp_path / "processed" / "chicago.csv").exists()
+
+    with pytest.raises(ValueError):
+        pipeline.run_pipeline(CONFIG, data_dir=tmp_path, only=["boston"])
+
+def test_parse_args_only():
+    args = pipeline.parse_args(["--resume", "--only", "chicago,new_york"])
+    assert args.command == "run"
+    assert args.resume
+    assert args.only == ["chicago", "new_york"]
+
+def test_parse_args_subcommands():
+    args = pipeline.parse_args(["--config", "c.yaml", "process", "--only", "chicago"])
+    assert args.command == "process"
+    assert args.config == "c.yaml"
+    assert args.only == ["chicago"]
+    assert not args.resume
+
+def test_parse_args_rejects_ignored_dag_combinations():
+    assert pipeline.parse_args(["--dag"]).dag
+    for argv in (["--dag", "process"], ["--dag", "--resume"], ["run", "--dag", "--resume"]):
+        with pytest.raises(SystemExit):
+            pipeline.parse_args(argv)
+
+def test_validate_config():
+    assert pipeline.validate_config(CONFIG) == []
+    problems = pipeline.validate_config({
+        "noaa_token": "A",
+        "cities": [{"name": "Chicago", "region": "PJM"},
+                   {"name": "chicago", "station_id": "S", "region": "PJM"}],
+    })
+    assert problems == ["missing key: eia_key",
+                        "cities[0] missing key: station_id",
+                        "duplicate city: chicago"]
+    assert pipeline.validate_config({"noaa_token": "A", "eia_key": "B",
+                                     "cities": None}) == ["cities must be a list"]
+    assert pipeline.validate_config({"noaa_token": "A", "eia_key": "B",
+                                     "cities": []}) == ["cities is empty"]
+
+def test_main_validate_null_cities(tmp_path, capsys):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text("noaa_token: A\neia_key: B\ncities:\n")
+    assert pipeline.main(["validate", "--config", str(cfg)]) == 1
+    assert "cities must be a list" in capsys.readouterr().out
+
+def test_subcommands_run_stages_separately(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls)
+    pipeline.run_fetch(CONFIG, data_dir=tmp_path)
+    assert not (tmp_path / "processed" / "chicago.csv").exists()
+
+    manifest = pipeline.run_process(CONFIG, data_dir=tmp_path, only=["chicago"])
+    assert (tmp_path / "processed" / "chicago.csv").exists()
+    assert not (tmp_path / "processed" / "new_york.csv").exists()
+
+    pipeline.run_report_only(CONFIG, data_dir=tmp_path)
+    report = json.loads((tmp_path / "quality_report.json").read_text())
+    assert set(report) == {"new_york", "chicago"}
+
+def test_run_graph_caches_between_runs(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls)
+    status = pipeline.run_graph(CONFIG, data_dir=tmp_path, workers=2)
+    assert set(status.values()) == {"ran"}
+    assert (tmp_path / "processed" / "chicago.csv").exists()
+    aggregates = json.loads((tmp_path / "aggregates.json").read_text())
+    assert set(aggregates) == {"new_york", "chicago"}
+
+    calls.clear()
+    status = pipeline.run_graph(CONFIG, data_dir=tmp_path, workers=2)
+    assert set(status.values()) == {"skipped"}
+    assert calls == []
+
+def _age_fetches(tmp_path, days):
+    path = tmp_path / "run_manifest.json"
+    data = json.loads(path.read_text())
+    end = (datetime.utcnow().date() - timedelta(days=days)).isoformat()
+    for city in data["cities"].values():
+        city["fetched"]["window_end"] = end
+    path.write_text(json.dumps(data))
+
+def test_resume_next_day_reuses_fresh_fetches(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls, fail_region="PJM")
+    pipeline.run_pipeline(CONFIG, data_dir=tmp_path)
+
+    # the quota resets tomorrow; only the failed city should be refetched
+    _age_fetches(tmp_path, 1)
+    calls.clear()
+    _fake_fetchers(monkeypatch, calls)
+    pipeline.run_pipeline(CONFIG, data_dir=tmp_path, resume=True)
+    assert calls == [("weather", "S2"), ("energy", "PJM")]
+
+    # stale fetches are redone, and --refresh forces a new fetch
+    _age_fetches(tmp_path, 3)
+    calls.clear()
+    pipeline.run_fetch(CONFIG, data_dir=tmp_path, resume=True, only=["new york"])
+    assert calls == [("weather", "S1"), ("energy", "NYIS")]
+
+    calls.clear()
+    pipeline.run_fetch(CONFIG, data_dir=tmp_path, resume=True, refresh=True,
+                       only=["new york"])
+    assert calls == [("weather", "S1"), ("energy", "NYIS")]
+
+def test_run_graph_one_failed_city_does_not_block_global_outputs(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls, fail_region="PJM")
+    status = pipeline.run_graph(CONFIG, data_dir=tmp_path, workers=2)
+    assert status["fetch_energy[chicago]"] == "failed"
+    assert status["merge[chicago]"] == "blocked"
+    for name in ("quality", "aggregates", "features", "publish"):
+        assert status[name] == "ran"
+    report = json.loads((tmp_path / "quality_report.json").read_text())
+    assert set(report) == {"new_york"}
+    assert (tmp_path / "shared" / "CURRENT").exists()
+
+def test_run_graph_only_keeps_other_cities_in_global_outputs(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls)
+    pipeline.run_graph(CONFIG, data_dir=tmp_path, workers=2)
+
+    status = pipeline.run_graph(CONFIG, data_dir=tmp_path, workers=2,
+                                only=["chicago"], refresh=True)
+    assert "fetch_weather[new_york]" not in status
+    assert status["fetch_weather[chicago]"] == "ran"
+    for name in ("quality_report.json", "aggregates.json"):
+        assert set(json.loads((tmp_path / name).read_text())) == {"new_york", "chicago"}
+    assert set(load_frames(tmp_path / "shared")) == {"new_york", "chicago"}
+
+def test_graph_features_pick_up_revised_days(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls)
+    pipeline.run_graph(CONFIG, data_dir=tmp_path, workers=2)
+
+    # a refetch revises a day that is already in the store
+    def energy(region, days, api_key):
+        return pd.DataFrame({"date": ["2025-01-01", "2025-01-02"],
+                             "demand": [999, 200]})
+    monkeypatch.setattr(data_fetcher, "fetch_historical_energy", energy)
+    pipeline.run_graph(CONFIG, data_dir=tmp_path, workers=2, refresh=True)
+
+    feats = pd.read_feather(tmp_path / "features.feather")
+    assert set(feats["city"].astype(str)) == {"new_york", "chicago"}
+    assert (feats.loc[feats["date"] == "2025-01-01", "demand"] == 999).all()
+
+def test_resume_after_graph_run_reuses_its_fetches(tmp_path, monkeypatch):
+    calls = []
+    _fake_fetchers(monkeypatch, calls, fail_region="PJM")
+    pipeline.run_graph(CONFIG, data_dir=tmp_path, workers=2)
+    manifest = pipeline.RunManifest.load(tmp_path / "run_manifest.json")
+    assert manifest.stage("new_york", "processed")["status"] == "done"
+    assert manifest.stage("chicago", "fetched")["status"] == "failed"
+
+    calls.clear()
+    _fake_fetchers(monkeypatch, calls)
+    pipeline.run_pipeline(CONFIG, data_dir=tmp_path, resume=True)
+    assert calls == [("weather", "S2"), ("energy", "PJM")]
+
+@pytest.mark.parametrize("kwargs", [{"only": ["chicago"]}, {"resume": True, "refresh": True}])
+def test_rerun_updates_revised_days_in_feature_store(tmp_path, monkeypatch, kwargs):
+    calls = []
+    _fake_fetchers(monkeypatch, calls)
+    pipeline.run_pipeline(CONFIG, data_dir=tmp_path)
+
+    def energy(region, days, api_key):
+        demand = [999, 200] if region == "PJM" else [100, 200]
+        return pd.DataFrame({"date": ["2025-01-01", "2025-01-02"], "demand": demand})
+    monkeypatch.setattr(data_fetcher, "fetch_historical_energy", energy)
+    pipeline.run_pipeline(CONFIG, data_dir=tmp_path, **kwargs)
+
+    feats = pd.read_feather(tmp_path / "features.feather")
+    day1 = feats[feats["date"] == "2025-01-01"].set_index("city")["demand"]
+    assert day1.to_dict() == {"chicago": 999, "new_york": 100}
@@ -0,0 +1,43 @@
+# tests/test_run_manifest.py
+
+import pytest
+
+from run_manifest import RunManifest, DONE, FAILED, fingerprint_files
+
+def test_mark_and_reload(tmp_path):
+    out = tmp_path / "out.csv"
+    out.write_text("x\n1\n")
+    path = tmp_path / "manifest.json"
+
+    m = RunManifest.load(path)
+    m.mark("chicago", "processed", DONE, "abc", outputs=[out])
+
+    reloaded = RunManifest.load(path)
+    assert reloaded.is_done("chicago", "processed", "abc")
+    assert not reloaded.is_done("chicago", "processed", "other")
+    assert not reloaded.is_done("houston", "processed", "abc")
+
+def test_not_done_when_failed_or_output_missing(tmp_path):
+    out = tmp_path / "out.csv"
+    m = RunManifest(tmp_path / "manifest.json")
+    m.mark("chicago", "fetched", DONE, "abc", outputs=[out])
+    assert not m.is_done("chicago", "fetched", "abc")  # output never written
+
+    out.write_text("x")
+    m.mark("chicago", "fetched", FAILED, "abc", error="quota")
+    assert not m.is_done("chicago", "fetched", "abc")
+    assert m.stage("chicago", "fetched")["error"] == "quota"
+
+def test_unknown_stage_rejected(tmp_path):
+    m = RunManifest(tmp_path / "manifest.json")
+    with pytest.raises(ValueError):
+        m.mark("chicago", "deployed", DONE)
+
+def test_fingerprint_files(tmp_path):
+    a = tmp_path / "a.csv"
+    a.write_text("1")
+    fp = fingerprint_files([a])
+    assert fp == fingerprint_files([a])
+    a.write_text("2")
+    assert fp != fingerprint_files([a])
+    assert fingerprint_files([tmp_path / "missing.csv"]) is None
@@ -0,0 +1,58 @@
+# tests/test_shared_dataset.py
+
+import pandas as pd
+import pyarrow as pa
+
+from shared_dataset import publish, current_version, open_tables, load_frames
+
+def _frame(demand):
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2025-01-01", "2025-01-02"]),
+        "TMAX": [50.0, 55.0],
+        "demand": [demand, demand + 1],
+        "respondent-name": ["PJM", "PJM"],
+    })
+
+def test_publish_and_load(tmp_path):
+    assert current_version(tmp_path) is None
+    assert load_frames(tmp_path) == {}
+
+    version = publish({"chicago": _frame(100), "houston": _frame(200)}, tmp_path)
+    assert current_version(tmp_path) == version
+
+    frames = load_frames(tmp_path, columns=["date", "demand"])
+    assert set(frames) == {"chicago", "houston"}
+    assert list(frames["chicago"].columns) == ["date", "demand"]
+    assert list(frames["houston"]["demand"]) == [200, 201]
+    assert frames["chicago"]["date"].iloc[0] == pd.Timestamp("2025-01-01")
+
+def test_tables_are_memory_mapped(tmp_path):
+    publish({"chicago": _frame(100)}, tmp_path)
+    before = pa.total_allocated_bytes()
+    table = open_tables(tmp_path)["chicago"]
+    assert table.column("demand").to_pylist() == [100, 101]
+    # buffers point into the mapped file, not the Arrow heap
+    assert pa.total_allocated_bytes() == before
+
+def test_new_version_swaps_and_prunes(tmp_path):
+    first = publish({"chicago": _frame(1)}, tmp_path, keep=2)
+    old = open_tables(tmp_path)["chicago"]
+
+    versions = [publish({"chicago": _frame(n)}, tmp_path, keep=2) for n in (2, 3)]
+    assert current_version(tmp_path) == versions[-1]
+    assert load_frames(tmp_path)["chicago"]["demand"].iloc[0] == 3
+
+    remaining = sorted(p.name for p in (tmp_path / "versions").iterdir())
+    assert remaining == versions
+    # a reader still holding the pruned version keeps its mapped data
+    assert first not in remaining
+    assert old.column("demand").to_pylist() == [1, 2]
+
+def test_publish_nothing_keeps_current_version(tmp_path):
+    assert publish({}, tmp_path) is None
+    assert current_version(tmp_path) is None
+
+    version = publish({"chicago": _frame(100)}, tmp_path)
+    assert publish({}, tmp_path) == version
+    assert current_version(tmp_path) == version
+    assert len(list((tmp_path / "versions").iterdir())) == 1
@@ -0,0 +1,119 @@
+# tests/test_stage_graph.py
+
+import json
+import threading
+from functools import partial
+
+import pytest
+
+from stage_graph import Stage, StageGraph, RAN, SKIPPED, FAILED, BLOCKED
+
+def _copy(src, dst, calls, suffix=""):
+    calls.append(dst.name)
+    dst.write_text(src.read_text() + suffix)
+
+def _copy_v2(src, dst, calls, suffix=""):
+    calls.append(dst.name)
+    dst.write_text(src.read_text().upper() + suffix)
+
+def _build(tmp_path, calls, report_func=_copy):
+    src, mid, out, rep = (tmp_path / n for n in ("src.txt", "mid.txt", "out.txt", "rep.txt"))
+    graph = StageGraph(tmp_path / "cache.json")
+    graph.add(Stage("clean", partial(_copy, src, mid, calls), inputs=[src], outputs=[mid]))
+    graph.add(Stage("merge", partial(_copy, mid, out, calls), inputs=[mid], outputs=[out]))
+    graph.add(Stage("quality", partial(report_func, mid, rep, calls),
+                    inputs=[mid], outputs=[rep], code=[report_func]))
+    return graph
+
+def test_unchanged_inputs_are_skipped(tmp_path):
+    (tmp_path / "src.txt").write_text("a")
+    calls = []
+    assert set(_build(tmp_path, calls).run().values()) == {RAN}
+    assert sorted(calls) == ["mid.txt", "out.txt", "rep.txt"]
+
+    calls.clear()
+    assert set(_build(tmp_path, calls).run().values()) == {SKIPPED}
+    assert calls == []
+
+    (tmp_path / "src.txt").write_text("b")
+    assert set(_build(tmp_path, calls).run().values()) == {RAN}
+
+def test_code_change_reruns_only_that_stage(tmp_path):
+    (tmp_path / "src.txt").write_text("a")
+    calls = []
+    _build(tmp_path, calls).run()
+
+    calls.clear()
+    status = _build(tmp_path, calls, report_func=_copy_v2).run()
+    assert status == {"clean": SKIPPED, "merge": SKIPPED, "quality": RAN}
+    assert calls == ["rep.txt"]
+
+def test_deleted_output_reruns(tmp_path):
+    (tmp_path / "src.txt").write_text("a")
+    calls = []
+    _build(tmp_path, calls).run()
+    (tmp_path / "out.txt").unlink()
+
+    calls.clear()
+    assert _build(tmp_path, calls).run()["merge"] == RAN
+    assert calls == ["out.txt"]
+
+def test_failure_blocks_downstream(tmp_path):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    def boom():
+        raise RuntimeError("quota")
+    graph = StageGraph(tmp_path / "cache.json")
+    graph.add(Stage("fetch", boom, outputs=[a]))
+    graph.add(Stage("clean", partial(_copy, a, b, []), inputs=[a], outputs=[b]))
+    assert graph.run() == {"fetch": FAILED, "clean": BLOCKED}
+
+def test_independent_stages_run_in_parallel(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+    def fetch(path):
+        barrier.wait()  # deadlocks (and times out) unless both run concurrently
+        path.write_text("x")
+    graph = StageGraph(tmp_path / "cache.json")
+    graph.add(Stage("w", partial(fetch, tmp_path / "w.txt"), outputs=[tmp_path / "w.txt"]))
+    graph.add(Stage("e", partial(fetch, tmp_path / "e.txt"), outputs=[tmp_path / "e.txt"]))
+    assert graph.run(workers=2) == {"w": RAN, "e": RAN}
+
+def test_cycle_rejected(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    graph = StageGraph(tmp_path / "cache.json")
+    graph.add(Stage("x", lambda: None, inputs=[a], outputs=[b]))
+    graph.add(Stage("y", lambda: None, inputs=[b], outputs=[a]))
+    with pytest.raises(ValueError):
+        graph.run()
+
+def test_max_age_reruns_stale_stage(tmp_path):
+    out = tmp_path / "raw.txt"
+    calls = []
+    def build(max_age):
+        graph = StageGraph(tmp_path / "cache.json")
+        graph.add(Stage("fetch", partial(lambda: (calls.append(1), out.write_text("x"))),
+                        outputs=[out], max_age_days=max_age))
+        return graph
+
+    assert build(1).run() == {"fetch": RAN}
+    assert build(1).run() == {"fetch": SKIPPED}
+
+    cache = json.loads((tmp_path / "cache.json").read_text())
+    cache["fetch"]["ran_at"] = "2000-01-01"
+    (tmp_path / "cache.json").write_text(json.dumps(cache))
+    assert build(None).run() == {"fetch": SKIPPED}
+    assert build(1).run() == {"fetch": RAN}
+    assert len(calls) == 2
+
+def test_optional_inputs_survive_failed_producer(tmp_path):
+    a, b, report = tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "report.txt"
+    def boom():
+        raise RuntimeError("quota")
+    def combine():
+        report.write_text(",".join(p.name for p in (a, b) if p.exists()))
+    graph = StageGraph(tmp_path / "cache.json")
+    graph.add(Stage("fetch_a", partial(a.write_text, "a"), outputs=[a]))
+    graph.add(Stage("fetch_b", boom, outputs=[b]))
+    graph.add(Stage("report", combine, optional_inputs=[a, b], outputs=[report]))
+    status = graph.run()
+    assert status == {"fetch_a": RAN, "fetch_b": FAILED, "report": RAN}
+    assert report.read_text() == "a.txt"